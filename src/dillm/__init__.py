@@ -1,4 +1,4 @@
-__all__ = ["find_symbol", "match", "match_file"]
+__all__ = ["find_callers", "find_refs", "find_symbol", "match", "match_file"]
 
 
 def __getattr__(name):
@@ -4,6 +4,9 @@ Usage:
     import dillm as dill
 
     results = dill.find_symbol("my_function", project="myproj", version="1.0.0")
+    results = dill.find_symbol("my_fu", mode="prefix")
+    results = dill.find_callers("my_function", project="myproj")
+    results = dill.find_refs("my_struct_t")
     results = dill.match("some code snippet", project="myproj")
     results = dill.match_file("path/to/file.c", project="myproj")
 """
@@ -15,10 +18,42 @@ def find_symbol(
     name: str,
     project: str | None = None,
     version: str | None = None,
+    mode: str = "exact",
+    limit: int = 20,
 ) -> list[dict]:
-    """Look up a symbol by exact name, optionally filtered by project/version."""
+    """Look up a symbol by name, optionally filtered by project/version.
+
+    mode is "exact" (full definitions), or "prefix"/"fuzzy" for typeahead,
+    which return name metadata only, up to limit entries.
+    """
     from dillm import db
-    return db.search_by_symbol(name, project=project, version=version)
+    if mode == "exact":
+        return db.search_by_symbol(name, project=project, version=version)
+    if mode not in ("prefix", "fuzzy"):
+        raise ValueError(f"unknown mode {mode!r}")
+    index = db.get_symbol_index()
+    lookup = index.prefix if mode == "prefix" else index.fuzzy
+    return lookup(name, limit=limit, project=project, version=version)
+
+
+def find_refs(
+    name: str,
+    project: str | None = None,
+    version: str | None = None,
+    kind: str | None = None,
+) -> list[dict]:
+    """Symbols that call or use name as a type; kind narrows to "call" or "type"."""
+    from dillm import refs
+    return refs.find(name, kind=kind, project=project, version=version)
+
+
+def find_callers(
+    name: str,
+    project: str | None = None,
+    version: str | None = None,
+) -> list[dict]:
+    """Symbols that call name."""
+    return find_refs(name, project=project, version=version, kind="call")
 
 
 def match(
@@ -26,14 +61,18 @@ def match(
     project: str | None = None,
     version: str | None = None,
     limit: int = 5,
+    aggregate: str = "max",
 ) -> list[dict]:
     """Similarity search against stored embeddings.
 
     If project/version provided, filter to matching metadata.
-    Otherwise search all.
+    Otherwise search all. Hits on several windows of a long symbol are
+    merged by their best ("max") or "mean" distance.
     """
     from dillm import db
-    return db.search(content, limit=limit, project=project, version=version)
+    return db.search(
+        content, limit=limit, project=project, version=version, aggregate=aggregate
+    )
 
 
 def match_file(
@@ -41,7 +80,10 @@ def match_file(
     project: str | None = None,
     version: str | None = None,
     limit: int = 5,
+    aggregate: str = "max",
 ) -> list[dict]:
     """Similarity search using file contents."""
     content = Path(path).read_text(encoding="utf-8", errors="replace")
-    return match(content, project=project, version=version, limit=limit)
+    return match(
+        content, project=project, version=version, limit=limit, aggregate=aggregate
+    )
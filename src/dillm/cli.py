@@ -2,7 +2,6 @@ import json
 import shutil
 
 import click
-import uvicorn
 
 
 @click.group()
@@ -14,14 +13,20 @@ def cli():
 @click.argument("symbol")
 @click.option("--project", "-p", default=None, help="Filter by project")
 @click.option("--version", "-v", default=None, help="Filter by version")
-def find(symbol, project, version):
-    """Look up a symbol by exact name."""
+@click.option("--prefix", "mode", flag_value="prefix", help="Match names starting with SYMBOL")
+@click.option("--fuzzy", "mode", flag_value="fuzzy", help="Match names similar to SYMBOL")
+@click.option("--limit", "-n", default=20, help="Max results for --prefix/--fuzzy")
+def find(symbol, project, version, mode, limit):
+    """Look up a symbol by exact name, prefix, or fuzzy match."""
     import dillm
     from rich.console import Console
     from rich.syntax import Syntax
     from rich.text import Text
 
-    results = dillm.find_symbol(symbol, project=project, version=version)
+    mode = mode or "exact"
+    results = dillm.find_symbol(
+        symbol, project=project, version=version, mode=mode, limit=limit
+    )
     console = Console()
     if not results:
         console.print(f"No results for '{symbol}'", style="dim")
@@ -42,22 +47,81 @@ def find(symbol, project, version):
             header.append(sym_name, style="bright_yellow bold")
         header.append(f" ({sym_type}) ", style="dim")
         header.append(f"{filename}:{start}-{end}", style="bright_black")
+        if mode == "fuzzy":
+            header.append(f" [{r.get('similarity', 0):.0%}]", style="green")
         console.print(header)
 
-        syntax = Syntax(content, "c", theme="ansi_dark", background_color="default")
+        # Typeahead modes return names only
+        if mode != "exact":
+            continue
+
+        syntax = Syntax(content, r.get("language") or "c", theme="ansi_dark", background_color="default")
         console.print(syntax)
 
         if i < len(results) - 1:
             console.print()
 
 
+def _print_refs(console, results):
+    from rich.text import Text
+
+    for r in results:
+        header = Text()
+        if r.get("symbol_type") == "func":
+            header.append(r.get("symbol_name", "unknown"), style="bright_cyan bold")
+        else:
+            header.append(r.get("symbol_name", "unknown"), style="bright_yellow bold")
+        header.append(f" ({r.get('kind', '')}) ", style="dim")
+        header.append(
+            f"{r.get('filename', '')}:{r.get('start_line', '?')}-{r.get('end_line', '?')}",
+            style="bright_black",
+        )
+        console.print(header)
+
+
+@cli.command()
+@click.argument("symbol")
+@click.option("--project", "-p", default=None, help="Filter by project")
+@click.option("--version", "-v", default=None, help="Filter by version")
+@click.option("--kind", "-k", type=click.Choice(["call", "type"]), default=None, help="Only calls or only type uses")
+def refs(symbol, project, version, kind):
+    """List symbols that call or use SYMBOL."""
+    import dillm
+    from rich.console import Console
+
+    results = dillm.find_refs(symbol, project=project, version=version, kind=kind)
+    console = Console()
+    if not results:
+        console.print(f"No references to '{symbol}'", style="dim")
+        return
+    _print_refs(console, results)
+
+
+@cli.command()
+@click.argument("symbol")
+@click.option("--project", "-p", default=None, help="Filter by project")
+@click.option("--version", "-v", default=None, help="Filter by version")
+def callers(symbol, project, version):
+    """List symbols that call SYMBOL."""
+    import dillm
+    from rich.console import Console
+
+    results = dillm.find_callers(symbol, project=project, version=version)
+    console = Console()
+    if not results:
+        console.print(f"No callers of '{symbol}'", style="dim")
+        return
+    _print_refs(console, results)
+
+
 @cli.command()
 @click.option("--text", "-t", default=None, help="Text to match against")
 @click.option("--file", "-f", "filepath", default=None, help="File to match against")
 @click.option("--project", "-p", default=None, help="Project name (optional)")
 @click.option("--version", "-v", default=None, help="Version string (optional)")
 @click.option("--limit", "-n", default=5, help="Max results")
-def match(text, filepath, project, version, limit):
+@click.option("--aggregate", type=click.Choice(["max", "mean"]), default="max", help="How window hits of one symbol are combined")
+def match(text, filepath, project, version, limit, aggregate):
     """Similarity search against stored embeddings."""
     import dillm
     from rich.console import Console
@@ -71,10 +135,12 @@ def match(text, filepath, project, version, limit):
 
     if filepath:
         results = dillm.match_file(
-            filepath, project=project, version=version, limit=limit
+            filepath, project=project, version=version, limit=limit, aggregate=aggregate
         )
     else:
-        results = dillm.match(text, project=project, version=version, limit=limit)
+        results = dillm.match(
+            text, project=project, version=version, limit=limit, aggregate=aggregate
+        )
 
     console = Console()
     if not results:
@@ -102,7 +168,7 @@ def match(text, filepath, project, version, limit):
         console.print(header)
 
         # Syntax highlighted code
-        syntax = Syntax(content, "c", theme="ansi_dark", background_color="default")
+        syntax = Syntax(content, r.get("language") or "c", theme="ansi_dark", background_color="default")
         console.print(syntax)
 
         if i < len(results) - 1:
@@ -114,7 +180,7 @@ def match(text, filepath, project, version, limit):
 @click.option("--project", "-p", default="default", help="Project name")
 @click.option("--version", "-v", default="0.0.0", help="Version string")
 def ingest(filepath, project, version):
-    """Ingest a C/C++ file into the store."""
+    """Ingest a source file into the store."""
     from dillm import db
 
     ids, duplicates = db.ingest_file(filepath, project=project, version=version)
@@ -169,12 +235,112 @@ def list_symbols(project, version):
     Console().print(table)
 
 
+def _int_list(ctx, param, value):
+    try:
+        return [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise click.BadParameter("expected comma-separated integers")
+
+
+@cli.command()
+@click.option("--m", "m_values", default="8,16,32", callback=_int_list, help="Candidate M values")
+@click.option("--ef-construction", "construction_efs", default="100,200", callback=_int_list, help="Candidate construction ef values")
+@click.option("--ef-search", "search_efs", default="10,50,100,200", callback=_int_list, help="Candidate search ef values")
+@click.option("--sample", "-s", default=100, help="Number of stored symbols to use as queries")
+@click.option("--k", "-k", default=10, help="Top-k used for recall")
+def tune(m_values, construction_efs, search_efs, sample, k):
+    """Compare HNSW settings by recall and latency against exact search."""
+    from rich.console import Console
+    from rich.table import Table
+    from dillm import tune as tuner
+
+    rows = tuner.run(m_values, construction_efs, search_efs, sample=sample, k=k)
+    if not rows:
+        print("No symbols found")
+        return
+
+    table = Table()
+    for column in ("M", "ef_construction", "ef_search", f"Recall@{k}", "p50 ms", "p99 ms", "Build s"):
+        table.add_column(column, header_style="bright_black", justify="right")
+
+    for r in rows:
+        table.add_row(
+            str(r["M"]),
+            str(r["construction_ef"]),
+            str(r["search_ef"]),
+            f"{r['recall']:.3f}",
+            f"{r['p50_ms']:.2f}",
+            f"{r['p99_ms']:.2f}",
+            f"{r['build_s']:.2f}",
+        )
+
+    Console().print(table)
+
+
+@cli.command()
+@click.option("--dim", "-d", default=0, help="Target dimension (0 keeps full vectors)")
+@click.option("--sample", "-s", default=10000, help="Vectors used to fit the projection")
+@click.option("--k", "-k", default=10, help="Top-k used for the recall report")
+def reindex(dim, sample, k):
+    """Rebuild the store with vectors projected to a smaller dimension."""
+    from dillm import db
+    from dillm import tune as tuner
+
+    try:
+        report = db.reindex(dim, sample=sample)
+    except ValueError as e:
+        raise click.UsageError(f"{e}; raise --sample or lower --dim")
+    if not report["count"]:
+        print("No symbols found")
+        return
+
+    print(f"Reindexed {report['count']} symbols: {report['full_dim']} -> {report['dim']} dims")
+    if report["dim"] < report["full_dim"]:
+        recall = tuner.projection_recall(report["full"], report["reduced"], k=k)
+        print(f"  recall@{k} vs full vectors (on the fitting sample): {recall:.3f}")
+
+
+@cli.command()
+@click.argument("key", required=False)
+@click.argument("value", required=False)
+def config(key, value):
+    """Show or set store config, e.g. `dill config hnsw.M 32`."""
+    from dillm import db
+
+    cfg = db.load_config()
+    if key is None:
+        print(json.dumps(cfg, indent=2))
+        return
+
+    section, _, name = key.partition(".")
+    if section not in cfg or name not in cfg[section]:
+        raise click.BadParameter(f"unknown config key '{key}'", param_hint="KEY")
+
+    if value is None:
+        print(cfg[section][name])
+        return
+
+    current = cfg[section][name]
+    try:
+        cfg[section][name] = type(current)(value)
+    except ValueError:
+        raise click.BadParameter(f"expected {type(current).__name__}", param_hint="VALUE")
+    db.save_config(cfg)
+    print(f"{key} = {cfg[section][name]}")
+
+
 @cli.command()
 @click.option("--host", default="127.0.0.1")
 @click.option("--port", default=7432)
-def serve(host, port):
+@click.option("--workers", "-w", default=1, help="Worker processes sharing one preloaded model")
+def serve(host, port, workers):
     """Start the HTTP server."""
-    uvicorn.run("dillm.server:app", host=host, port=port)
+    import os
+    from dillm import server
+
+    if workers > 1 and not hasattr(os, "fork"):
+        raise click.UsageError("--workers requires a platform with fork()")
+    server.run(host, port, workers=workers)
 
 
 @cli.command()
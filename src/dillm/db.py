@@ -1,16 +1,53 @@
+import json
 import logging
+import threading
 import uuid
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 STORE_PATH = Path("./store")
+CONFIG_PATH = STORE_PATH / "config.json"
+PROJECTION_PATH = STORE_PATH / "projection.npz"
+# Rewritten whenever symbols are added, so other processes can tell their
+# in-memory symbol index is stale
+GENERATION_PATH = STORE_PATH / "generation"
 MODEL_NAME = "microsoft/unixcoder-base"
+COLLECTION_NAME = "documents"
+# Extra windows of long symbols, linked back via "parent_id" metadata
+WINDOWS_COLLECTION_NAME = "documents-windows"
+
+# Sliding windows for text longer than the model context. WINDOW_TOKENS
+# includes the CLS/SEP tokens; windows are embedded WINDOW_BATCH at a time.
+WINDOW_TOKENS = 512
+WINDOW_OVERLAP = 128
+WINDOW_BATCH = 32
+# How many window hits to fetch per requested result, since several windows
+# of one symbol collapse into a single result
+WINDOW_FANOUT = 4
+
+# HNSW index parameters, keyed by the suffix of Chroma's "hnsw:*" metadata.
+# space/M/construction_ef only take effect when the collection is created;
+# search_ef is applied to existing collections as well.
+DEFAULT_HNSW = {
+    "space": "cosine",
+    "M": 16,
+    "construction_ef": 100,
+    "search_ef": 100,
+    "batch_size": 100,
+    "sync_threshold": 1000,
+}
 
 _model = None
 _tokenizer = None
+_model_lock = threading.Lock()
 _device = None
 _torch = None
+_config = None
+_projection = None
+_symbol_index = None
+_symbol_index_generation = None
+_symbol_index_lock = threading.Lock()
 
 
 def _get_torch():
@@ -37,16 +74,29 @@ def get_device():
 def get_model():
     global _model, _tokenizer
     if _model is None:
-        from transformers import AutoModel, AutoTokenizer
-        device = get_device()
-        _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        _model = AutoModel.from_pretrained(MODEL_NAME)
-        _model.to(device)
-        _model.eval()
+        # Callers racing the server's background load wait for it rather
+        # than loading a second copy
+        with _model_lock:
+            if _model is None:
+                from transformers import AutoModel, AutoTokenizer
+                device = get_device()
+                tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+                model = AutoModel.from_pretrained(MODEL_NAME)
+                model.to(device)
+                model.eval()
+                _tokenizer = tokenizer
+                _model = model
     return _model, _tokenizer
 
 
-def embed(text: str) -> list[float]:
+def warmup() -> None:
+    """Run short and multi-window forward passes to trigger lazy init."""
+    embed("int main(void) { return 0; }")
+    embed_windows("x " * 1024)
+
+
+def embed(text: str, reduce: bool = True) -> list[float]:
+    """Embed text, applying the store's projection unless reduce is False."""
     torch = _get_torch()
     model, tokenizer = get_model()
     device = get_device()
@@ -55,20 +105,191 @@ def embed(text: str) -> list[float]:
     with torch.no_grad():
         outputs = model(**inputs)
     embedding = outputs.last_hidden_state[:, 0, :].squeeze().cpu().numpy()
+    projection = get_projection() if reduce else None
+    if projection is not None:
+        embedding = apply_projection(embedding, projection)
     return embedding.tolist()
 
 
+def _cls_embeddings(inputs):
+    """Run one padded batch through the model and return its CLS vectors."""
+    torch = _get_torch()
+    model, _ = get_model()
+    device = get_device()
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+    with torch.no_grad():
+        outputs = model(**inputs)
+    return outputs.last_hidden_state[:, 0, :].cpu().numpy()
+
+
+def embed_batch(texts: list[str], reduce: bool = True):
+    """Embed texts truncated to the model context, WINDOW_BATCH at a time.
+
+    Row i matches embed(texts[i]); returns a float32 array.
+    """
+    import numpy as np
+    _, tokenizer = get_model()
+    embeddings = []
+    for i in range(0, len(texts), WINDOW_BATCH):
+        inputs = tokenizer(
+            texts[i:i + WINDOW_BATCH],
+            return_tensors="pt",
+            truncation=True,
+            max_length=WINDOW_TOKENS,
+            padding=True,
+        )
+        embeddings.append(_cls_embeddings(inputs))
+    embeddings = np.concatenate(embeddings).astype(np.float32)
+    projection = get_projection() if reduce else None
+    if projection is not None:
+        embeddings = apply_projection(embeddings, projection)
+    return embeddings
+
+
+def window_spans(length: int, size: int, overlap: int) -> list[tuple[int, int]]:
+    """Split length tokens into (start, end) windows of size, each
+    overlapping the last."""
+    if length <= size:
+        return [(0, length)]
+    step = size - overlap
+    starts = list(range(0, length - size + 1, step))
+    if starts[-1] + size < length:
+        starts.append(length - size)
+    return [(start, start + size) for start in starts]
+
+
+def _embed_token_windows(chunks: list[list[int]]):
+    """Embed token id windows (without special tokens), WINDOW_BATCH at a
+    time; returns a float32 array of full-size vectors."""
+    import numpy as np
+    _, tokenizer = get_model()
+    embeddings = []
+    for i in range(0, len(chunks), WINDOW_BATCH):
+        batch = [
+            tokenizer.build_inputs_with_special_tokens(chunk)
+            for chunk in chunks[i:i + WINDOW_BATCH]
+        ]
+        inputs = tokenizer.pad({"input_ids": batch}, return_tensors="pt")
+        embeddings.append(_cls_embeddings(inputs))
+    return np.concatenate(embeddings).astype(np.float32)
+
+
+def embed_windows(
+    text: str, reduce: bool = True
+) -> list[tuple[tuple[int, int], list[float]]]:
+    """Embed text as overlapping token windows, batched through the model.
+
+    Returns ((start, end), embedding) pairs, where start/end index the
+    text's token ids without special tokens. Text that fits in the model
+    context yields a single window equivalent to embed(text).
+    """
+    _, tokenizer = get_model()
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    spans = window_spans(len(ids), WINDOW_TOKENS - 2, WINDOW_OVERLAP)
+    embeddings = _embed_token_windows([ids[start:end] for start, end in spans])
+    projection = get_projection() if reduce else None
+    if projection is not None:
+        embeddings = apply_projection(embeddings, projection)
+    return list(zip(spans, embeddings.tolist()))
+
+
+def get_projection():
+    """Return the store's PCA projection as (mean, components), or None."""
+    global _projection
+    if _projection is None and PROJECTION_PATH.exists():
+        import numpy as np
+        data = np.load(PROJECTION_PATH)
+        _projection = (data["mean"], data["components"])
+    return _projection
+
+
+def fit_projection(vectors, dim: int):
+    """Fit a PCA projection to dim components on the given vectors.
+
+    Raises ValueError if there are fewer vectors than components, since PCA
+    cannot produce more components than fitting samples.
+    """
+    import numpy as np
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dim > len(vectors):
+        raise ValueError(
+            f"cannot fit {dim} components from {len(vectors)} sample vectors"
+        )
+    mean = vectors.mean(axis=0)
+    _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+    return mean, vt[:dim]
+
+
+def apply_projection(vectors, projection):
+    import numpy as np
+    mean, components = projection
+    return (np.asarray(vectors, dtype=np.float32) - mean) @ components.T
+
+
+def load_config() -> dict:
+    """Load store config, filling in defaults for missing keys."""
+    global _config
+    if _config is None:
+        stored = {}
+        if CONFIG_PATH.exists():
+            stored = json.loads(CONFIG_PATH.read_text())
+        _config = {"hnsw": {**DEFAULT_HNSW, **stored.get("hnsw", {})}}
+    return _config
+
+
+def save_config(config: dict) -> None:
+    global _config
+    STORE_PATH.mkdir(parents=True, exist_ok=True)
+    CONFIG_PATH.write_text(json.dumps(config, indent=2) + "\n")
+    _config = None
+
+
+def hnsw_metadata(hnsw: dict) -> dict:
+    """Convert HNSW settings into Chroma collection metadata."""
+    return {f"hnsw:{key}": value for key, value in hnsw.items()}
+
+
 def get_client():
     import chromadb
     STORE_PATH.mkdir(parents=True, exist_ok=True)
     return chromadb.PersistentClient(path=str(STORE_PATH))
 
 
-def get_collection():
+def _stored_hnsw(collection) -> dict:
+    """HNSW settings a collection was created with, in Chroma's naming."""
+    return (collection.configuration or {}).get("hnsw") or {}
+
+
+def _get_windows_collection(client):
+    """Return the windows collection, creating it on first use.
+
+    It is created with the main collection's stored HNSW settings rather
+    than the live config, so distances from both stay comparable even if
+    the config changed after the main collection was created.
+    """
+    from chromadb.errors import NotFoundError
+    try:
+        return client.get_collection(WINDOWS_COLLECTION_NAME)
+    except NotFoundError:
+        hnsw = _stored_hnsw(get_collection())
+        return client.get_or_create_collection(
+            name=WINDOWS_COLLECTION_NAME, configuration={"hnsw": hnsw}
+        )
+
+
+def get_collection(name: str = COLLECTION_NAME):
     client = get_client()
-    return client.get_or_create_collection(
-        name="documents", metadata={"hnsw:space": "cosine"}
-    )
+    hnsw = load_config()["hnsw"]
+    if name == WINDOWS_COLLECTION_NAME:
+        collection = _get_windows_collection(client)
+    else:
+        collection = client.get_or_create_collection(
+            name=name, metadata=hnsw_metadata(hnsw)
+        )
+    current = _stored_hnsw(collection)
+    if current.get("ef_search", hnsw["search_ef"]) != hnsw["search_ef"]:
+        collection.modify(configuration={"hnsw": {"ef_search": hnsw["search_ef"]}})
+    return collection
 
 
 def ingest(content: str) -> str:
@@ -84,7 +305,14 @@ def search(
     limit: int = 5,
     project: str | None = None,
     version: str | None = None,
+    aggregate: str = "max",
 ) -> list[dict]:
+    """Similarity search over symbols and their extra windows.
+
+    Long queries are split into windows too. Hits from every (query window,
+    symbol window) pair are grouped by parent symbol and scored by their
+    best distance ("max") or mean distance ("mean").
+    """
     collection = get_collection()
     if collection.count() == 0:
         return []
@@ -98,18 +326,61 @@ def search(
     elif version is not None:
         where = {"version": version}
 
-    embedding = embed(query)
+    embeddings = [embedding for _, embedding in embed_windows(query)]
     results = collection.query(
-        query_embeddings=[embedding],
+        query_embeddings=embeddings,
         n_results=limit,
         include=["documents", "distances", "metadatas"],
         where=where,
     )
+    distances: dict[str, list[float]] = {}
+    found: dict[str, tuple[str, dict]] = {}
+    for q in range(len(embeddings)):
+        for i, doc_id in enumerate(results["ids"][q]):
+            distances.setdefault(doc_id, []).append(results["distances"][q][i])
+            metadata = results["metadatas"][q][i] if results["metadatas"] else {}
+            found[doc_id] = (results["documents"][q][i], metadata or {})
+
+    windows = get_collection(WINDOWS_COLLECTION_NAME)
+    space = _stored_hnsw(collection).get("space")
+    if windows.count() and _stored_hnsw(windows).get("space") != space:
+        # Distances in different spaces can't be ranked together
+        logger.warning(
+            "%s does not use the %s space; ignoring window hits until reindex",
+            WINDOWS_COLLECTION_NAME, space,
+        )
+    elif windows.count():
+        results = windows.query(
+            query_embeddings=embeddings,
+            n_results=limit * WINDOW_FANOUT,
+            include=["distances", "metadatas"],
+            where=where,
+        )
+        for q in range(len(embeddings)):
+            for i, metadata in enumerate(results["metadatas"][q]):
+                parent_id = metadata["parent_id"]
+                distances.setdefault(parent_id, []).append(results["distances"][q][i])
+
+    if aggregate == "mean":
+        scores = {doc_id: sum(d) / len(d) for doc_id, d in distances.items()}
+    else:
+        scores = {doc_id: min(d) for doc_id, d in distances.items()}
+    ranked = sorted(scores, key=scores.get)[:limit]
+
+    # Parents reached only through a window still need their document
+    missing = [doc_id for doc_id in ranked if doc_id not in found]
+    if missing:
+        parents = collection.get(ids=missing, include=["documents", "metadatas"])
+        for i, doc_id in enumerate(parents["ids"]):
+            metadata = parents["metadatas"][i] if parents["metadatas"] else {}
+            found[doc_id] = (parents["documents"][i], metadata or {})
+
     out = []
-    for i, doc_id in enumerate(results["ids"][0]):
-        distance = results["distances"][0][i]
-        content = results["documents"][0][i]
-        metadata = results["metadatas"][0][i] if results["metadatas"] else {}
+    for doc_id in ranked:
+        if doc_id not in found:
+            continue
+        content, metadata = found[doc_id]
+        distance = scores[doc_id]
         similarity = 1 / (1 + distance)
         snippet = content[:200] + "..." if len(content) > 200 else content
         out.append(
@@ -124,6 +395,7 @@ def search(
                 "end_line": metadata.get("end_line"),
                 "symbol_name": metadata.get("symbol_name", ""),
                 "symbol_type": metadata.get("symbol_type", ""),
+                "language": metadata.get("language", ""),
                 "project": metadata.get("project", ""),
                 "version": metadata.get("version", ""),
             }
@@ -171,6 +443,7 @@ def search_by_symbol(
                 "end_line": metadata.get("end_line"),
                 "symbol_name": metadata.get("symbol_name", ""),
                 "symbol_type": metadata.get("symbol_type", ""),
+                "language": metadata.get("language", ""),
                 "project": metadata.get("project", ""),
                 "version": metadata.get("version", ""),
             }
@@ -189,6 +462,7 @@ def ingest_file(
     Returns:
         Tuple of (list of ingested IDs, dict of duplicate symbol names -> count)
     """
+    from dillm import refs
     from dillm.parser import extract_symbols
 
     symbols = extract_symbols(filepath, original_filename)
@@ -197,6 +471,7 @@ def ingest_file(
 
     collection = get_collection()
     ids = []
+    added = []
     seen: dict[str, int] = {}
     duplicates: dict[str, int] = {}
 
@@ -220,29 +495,123 @@ def ingest_file(
             duplicates[name] = duplicates.get(name, 0) + 1
             continue
 
-        embedding = embed(sym["text"])
+        sym_windows = embed_windows(sym["text"])
         doc_id = str(uuid.uuid4())
+        metadata = {
+            "filename": sym["filename"],
+            "filepath": sym["filepath"],
+            "start_line": sym["start_line"],
+            "end_line": sym["end_line"],
+            "symbol_name": sym["symbol_name"],
+            "symbol_type": sym["symbol_type"],
+            "language": sym["language"],
+            "project": project,
+            "version": version,
+        }
         collection.add(
             ids=[doc_id],
-            embeddings=[embedding],
+            embeddings=[sym_windows[0][1]],
             documents=[sym["text"]],
-            metadatas=[
-                {
-                    "filename": sym["filename"],
-                    "filepath": sym["filepath"],
-                    "start_line": sym["start_line"],
-                    "end_line": sym["end_line"],
-                    "symbol_name": sym["symbol_name"],
-                    "symbol_type": sym["symbol_type"],
-                    "project": project,
-                    "version": version,
-                }
-            ],
+            metadatas=[metadata],
+        )
+        if len(sym_windows) > 1:
+            # Windows keep token offsets into the parent's text, not text
+            get_collection(WINDOWS_COLLECTION_NAME).add(
+                ids=[f"{doc_id}:{i}" for i in range(1, len(sym_windows))],
+                embeddings=[embedding for _, embedding in sym_windows[1:]],
+                metadatas=[
+                    {
+                        "parent_id": doc_id,
+                        "window": i,
+                        "token_start": start,
+                        "token_end": end,
+                        "project": project,
+                        "version": version,
+                    }
+                    for i, ((start, end), _) in enumerate(sym_windows[1:], 1)
+                ],
+            )
+        added.append(
+            {**metadata, "id": doc_id, "calls": sym["calls"], "types": sym["types"]}
         )
         ids.append(doc_id)
+
+    refs.add(added)
+    _index_symbols(added)
     return ids, duplicates
 
 
+def _symbol_entry(doc_id: str, metadata: dict) -> dict:
+    return {
+        "id": doc_id,
+        "filename": metadata.get("filename", ""),
+        "filepath": metadata.get("filepath", ""),
+        "start_line": metadata.get("start_line"),
+        "end_line": metadata.get("end_line"),
+        "symbol_name": metadata.get("symbol_name", ""),
+        "symbol_type": metadata.get("symbol_type", ""),
+        "language": metadata.get("language", ""),
+        "project": metadata.get("project", ""),
+        "version": metadata.get("version", ""),
+    }
+
+
+def _read_generation() -> str | None:
+    try:
+        return GENERATION_PATH.read_text()
+    except FileNotFoundError:
+        return None
+
+
+def _index_symbols(added: list[dict]) -> None:
+    """Stamp a new store generation and add symbols to the in-memory index.
+
+    The index is only updated in place if it was current before this
+    ingest; otherwise it is left stale and rebuilt on the next lookup.
+    """
+    global _symbol_index_generation
+    if not added:
+        return
+    with _symbol_index_lock:
+        current = (
+            _symbol_index is not None
+            and _symbol_index_generation == _read_generation()
+        )
+        generation = uuid.uuid4().hex
+        STORE_PATH.mkdir(parents=True, exist_ok=True)
+        staging = GENERATION_PATH.with_suffix(".tmp")
+        staging.write_text(generation)
+        staging.replace(GENERATION_PATH)
+        if current:
+            for sym in added:
+                _symbol_index.add(_symbol_entry(sym["id"], sym))
+            _symbol_index_generation = generation
+
+
+def get_symbol_index():
+    """Return the in-memory symbol-name index, rebuilding it when stale.
+
+    Ingests in this process update it in place. Each call compares the
+    store's generation stamp with the one the index was built at, so
+    ingests from other processes trigger a rebuild on the next lookup.
+    """
+    global _symbol_index, _symbol_index_generation
+    generation = _read_generation()
+    if _symbol_index is None or generation != _symbol_index_generation:
+        with _symbol_index_lock:
+            generation = _read_generation()
+            if _symbol_index is None or generation != _symbol_index_generation:
+                from dillm.symbols import SymbolIndex
+                results = get_collection().get(include=["metadatas"])
+                _symbol_index = SymbolIndex(
+                    _symbol_entry(doc_id, metadata or {})
+                    for doc_id, metadata in zip(results["ids"], results["metadatas"])
+                    if metadata and metadata.get("symbol_name")
+                )
+                _symbol_index_generation = generation
+    return _symbol_index
+
+
 def list_symbols(
     project: str | None = None,
     version: str | None = None,
@@ -275,6 +644,7 @@ def list_symbols(
                 "end_line": metadata.get("end_line"),
                 "symbol_name": metadata.get("symbol_name", ""),
                 "symbol_type": metadata.get("symbol_type", ""),
+                "language": metadata.get("language", ""),
                 "project": metadata.get("project", ""),
                 "version": metadata.get("version", ""),
             }
@@ -306,3 +676,151 @@ def get_all() -> list[dict]:
             }
         )
     return out
+
+
+# Rows fetched per collection.get() page while reindexing
+REINDEX_PAGE = 1000
+
+
+def _pages(collection, include: list[str]):
+    """Yield collection.get() results REINDEX_PAGE rows at a time."""
+    offset = 0
+    while True:
+        page = collection.get(limit=REINDEX_PAGE, offset=offset, include=include)
+        if not page["ids"]:
+            return
+        yield page
+        offset += len(page["ids"])
+
+
+def _full_vectors(page: dict, rows: list[int] | None = None):
+    """Full-size vectors for rows of a page (all rows if None).
+
+    Stored embeddings are full-size until a projection exists; after that
+    they are recomputed from the documents in model-sized batches.
+    """
+    import numpy as np
+    if rows is None:
+        rows = range(len(page["ids"]))
+    if get_projection() is None:
+        return np.asarray([page["embeddings"][i] for i in rows], dtype=np.float32)
+    return embed_batch([page["documents"][i] for i in rows], reduce=False)
+
+
+def _window_vectors(page: dict):
+    """Full-size vectors for a page of windows.
+
+    Windows store token offsets rather than text, so once stored vectors
+    are projected they are re-embedded from slices of their parent
+    symbol's token ids.
+    """
+    import numpy as np
+    if get_projection() is None:
+        return np.asarray(page["embeddings"], dtype=np.float32)
+    _, tokenizer = get_model()
+    metadatas = page["metadatas"]
+    parents = get_collection().get(
+        ids=list({metadata["parent_id"] for metadata in metadatas}),
+        include=["documents"],
+    )
+    tokens = {
+        doc_id: tokenizer(document, add_special_tokens=False)["input_ids"]
+        for doc_id, document in zip(parents["ids"], parents["documents"])
+    }
+    return _embed_token_windows([
+        tokens[metadata["parent_id"]][metadata["token_start"]:metadata["token_end"]]
+        for metadata in metadatas
+    ])
+
+
+def _source_include() -> list[str]:
+    return ["embeddings"] if get_projection() is None else ["documents"]
+
+
+def _rebuild(name: str, projection) -> None:
+    """Replace collection name with its entries re-projected page by page."""
+    # Build the replacement alongside the live collection, then swap names
+    client = get_client()
+    hnsw = load_config()["hnsw"]
+    staging_name = f"{name}-reindex"
+    if staging_name in [c.name for c in client.list_collections()]:
+        client.delete_collection(staging_name)
+    staging = client.create_collection(
+        name=staging_name, metadata=hnsw_metadata(hnsw)
+    )
+    if name == WINDOWS_COLLECTION_NAME:
+        full_vectors = _window_vectors
+        include = ["metadatas"] if get_projection() else ["metadatas", "embeddings"]
+    else:
+        full_vectors = _full_vectors
+        include = list({"documents", "metadatas", *_source_include()})
+    for page in _pages(get_collection(name), include):
+        vectors = full_vectors(page)
+        if projection is not None:
+            vectors = apply_projection(vectors, projection)
+        staging.add(
+            ids=page["ids"],
+            embeddings=vectors,
+            documents=page["documents"],
+            metadatas=page["metadatas"],
+        )
+    client.delete_collection(name)
+    staging.modify(name=name)
+
+
+def reindex(dim: int, sample: int = 10000, seed: int = 0) -> dict:
+    """Rebuild the collections with vectors reduced to dim (0 for full size).
+
+    The PCA projection is fitted on up to `sample` full-size symbol vectors
+    and saved alongside the store so later ingests and queries are projected
+    the same way. Full-size vectors are taken from the store when it has no
+    projection yet, and recomputed from the stored documents otherwise.
+    Collections are read and rewritten a page at a time, so memory is
+    bounded by the sample and page size rather than the store size.
+
+    Returns a report with the full and reduced sample vectors so callers can
+    measure the recall impact.
+    """
+    import random
+    import numpy as np
+    global _projection
+
+    collection = get_collection()
+    count = collection.count()
+    if not count:
+        return {"count": 0}
+
+    # Gather the fitting sample in one paged pass
+    picks = set(random.Random(seed).sample(range(count), min(sample, count)))
+    chunks = []
+    offset = 0
+    for page in _pages(collection, _source_include()):
+        rows = [i for i in range(len(page["ids"])) if offset + i in picks]
+        if rows:
+            chunks.append(_full_vectors(page, rows))
+        offset += len(page["ids"])
+    full = np.concatenate(chunks)
+
+    projection = None
+    reduced = full
+    if 0 < dim < full.shape[1]:
+        projection = fit_projection(full, dim)
+        reduced = apply_projection(full, projection)
+
+    _rebuild(COLLECTION_NAME, projection)
+    if get_collection(WINDOWS_COLLECTION_NAME).count():
+        _rebuild(WINDOWS_COLLECTION_NAME, projection)
+
+    if projection is None:
+        PROJECTION_PATH.unlink(missing_ok=True)
+    else:
+        np.savez(PROJECTION_PATH, mean=projection[0], components=projection[1])
+    _projection = None
+
+    return {
+        "count": count,
+        "full_dim": full.shape[1],
+        "dim": reduced.shape[1],
+        "full": full,
+        "reduced": reduced,
+    }
@@ -1,21 +1,16 @@
+import bisect
+import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 
 import tree_sitter_c
 import tree_sitter_cpp
+import tree_sitter_javascript
+import tree_sitter_python
+import tree_sitter_typescript
 from tree_sitter import Language, Parser, Query, QueryCursor
 
-C_LANGUAGE = Language(tree_sitter_c.language())
-CPP_LANGUAGE = Language(tree_sitter_cpp.language())
-
-LANG_MAP = {
-    ".c": C_LANGUAGE,
-    ".h": CPP_LANGUAGE,
-    ".cpp": CPP_LANGUAGE,
-    ".hpp": CPP_LANGUAGE,
-    ".cc": CPP_LANGUAGE,
-    ".cxx": CPP_LANGUAGE,
-}
-
 # Queries capture both the symbol node and its name directly
 C_QUERY = """
 (function_definition
@@ -50,39 +45,205 @@ CPP_QUERY = """
   body: (_)) @class
 """
 
-SYMBOL_QUERIES = {
-    ".c": C_QUERY,
-    ".h": CPP_QUERY,
-    ".cpp": CPP_QUERY,
-    ".hpp": CPP_QUERY,
-    ".cc": CPP_QUERY,
-    ".cxx": CPP_QUERY,
+PYTHON_QUERY = """
+(function_definition
+  name: (identifier) @name) @func
+
+(class_definition
+  name: (identifier) @name) @class
+"""
+
+JS_QUERY = """
+(function_declaration
+  name: (identifier) @name) @func
+
+(generator_function_declaration
+  name: (identifier) @name) @func
+
+(method_definition
+  name: (property_identifier) @name) @func
+
+(variable_declarator
+  name: (identifier) @name
+  value: [(arrow_function) (function_expression)]) @func
+
+(class_declaration
+  name: (identifier) @name) @class
+"""
+
+TS_QUERY = """
+(function_declaration
+  name: (identifier) @name) @func
+
+(generator_function_declaration
+  name: (identifier) @name) @func
+
+(method_definition
+  name: (property_identifier) @name) @func
+
+(variable_declarator
+  name: (identifier) @name
+  value: [(arrow_function) (function_expression)]) @func
+
+(class_declaration
+  name: (type_identifier) @name) @class
+
+(abstract_class_declaration
+  name: (type_identifier) @name) @class
+
+(interface_declaration
+  name: (type_identifier) @name) @interface
+"""
+
+# Reference queries capture calls (@call) and type uses (@type) anywhere in
+# the tree; each capture is attributed to its innermost enclosing symbol
+C_REFS_QUERY = """
+(call_expression
+  function: (identifier) @call)
+
+(call_expression
+  function: (field_expression
+    field: (field_identifier) @call))
+
+(type_identifier) @type
+"""
+
+CPP_REFS_QUERY = C_REFS_QUERY + """
+(call_expression
+  function: (qualified_identifier
+    name: (identifier) @call))
+"""
+
+PYTHON_REFS_QUERY = """
+(call
+  function: (identifier) @call)
+
+(call
+  function: (attribute
+    attribute: (identifier) @call))
+
+(type
+  (identifier) @type)
+"""
+
+JS_REFS_QUERY = """
+(call_expression
+  function: (identifier) @call)
+
+(call_expression
+  function: (member_expression
+    property: (property_identifier) @call))
+
+(new_expression
+  constructor: (identifier) @call)
+"""
+
+TS_REFS_QUERY = JS_REFS_QUERY + """
+(type_identifier) @type
+"""
+
+
+@dataclass(frozen=True)
+class LanguageSpec:
+    """A grammar and its symbol/reference queries, compiled once at import."""
+
+    name: str
+    language: Language
+    query: Query
+    refs_query: Query
+
+
+def _spec(name: str, language, query: str, refs_query: str) -> LanguageSpec:
+    lang = Language(language)
+    return LanguageSpec(name, lang, Query(lang, query), Query(lang, refs_query))
+
+
+LANGUAGES = {
+    spec.name: spec
+    for spec in (
+        _spec("c", tree_sitter_c.language(), C_QUERY, C_REFS_QUERY),
+        _spec("cpp", tree_sitter_cpp.language(), CPP_QUERY, CPP_REFS_QUERY),
+        _spec("python", tree_sitter_python.language(), PYTHON_QUERY, PYTHON_REFS_QUERY),
+        _spec("javascript", tree_sitter_javascript.language(), JS_QUERY, JS_REFS_QUERY),
+        _spec("typescript", tree_sitter_typescript.language_typescript(), TS_QUERY, TS_REFS_QUERY),
+        _spec("tsx", tree_sitter_typescript.language_tsx(), TS_QUERY, TS_REFS_QUERY),
+    )
+}
+
+# None marks an ambiguous extension resolved from file content
+LANG_MAP = {
+    ".c": "c",
+    ".h": None,
+    ".cpp": "cpp",
+    ".hpp": "cpp",
+    ".cc": "cpp",
+    ".cxx": "cpp",
+    ".hh": "cpp",
+    ".py": "python",
+    ".pyi": "python",
+    ".js": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".mts": "typescript",
+    ".cts": "typescript",
+    ".tsx": "tsx",
 }
 
+# Constructs that only appear in C++ headers
+CPP_MARKERS = re.compile(
+    rb"^\s*(?:class|namespace|template)\b|\b(?:public|private|protected)\s*:|\w::\w",
+    re.MULTILINE,
+)
+
+_local = threading.local()
+
+
+def get_parser(spec: LanguageSpec) -> Parser:
+    """Return this thread's parser for a language, creating it on first use."""
+    parsers = getattr(_local, "parsers", None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    parser = parsers.get(spec.name)
+    if parser is None:
+        parser = parsers[spec.name] = Parser(spec.language)
+    return parser
+
+
+def detect_language(ext: str, content: bytes) -> tuple[str, LanguageSpec] | None:
+    """Return the language name for a file and the spec used to parse it.
+
+    .h is ambiguous, so its name comes from the content. C headers are still
+    parsed with the C++ grammar, which recovers from macro-heavy code better
+    than the C grammar does (clay.h loses functions under the C grammar).
+    """
+    if ext not in LANG_MAP:
+        return None
+    name = LANG_MAP[ext]
+    if name is None:
+        name = "cpp" if CPP_MARKERS.search(content) else "c"
+        return name, LANGUAGES["cpp"]
+    return name, LANGUAGES[name]
+
 
 def extract_symbols(filepath: str, original_filename: str | None = None) -> list[dict]:
-    """Extract functions, structs, and classes from C/C++ files."""
+    """Extract functions, structs, and classes from supported source files."""
     path = Path(filepath)
     ext = path.suffix.lower()
 
     if ext not in LANG_MAP:
         return []
 
-    lang = LANG_MAP[ext]
-    query_str = SYMBOL_QUERIES[ext]
-
-    content = path.read_text(encoding="utf-8", errors="replace")
-    content_bytes = content.encode()
-
-    parser = Parser(lang)
-    tree = parser.parse(content_bytes)
-
-    query = Query(lang, query_str)
-    cursor = QueryCursor(query)
+    content_bytes = path.read_bytes()
+    language, spec = detect_language(ext, content_bytes)
+    tree = get_parser(spec).parse(content_bytes)
+    cursor = QueryCursor(spec.query)
 
     filename = original_filename or path.name
 
     symbols = []
+    spans = []
     seen_nodes = set()
 
     for _, captures in cursor.matches(tree.root_node):
@@ -107,8 +268,8 @@ def extract_symbols(filepath: str, original_filename: str | None = None) -> list
             continue
         seen_nodes.add(node_id)
 
-        symbol_name = content_bytes[name_node.start_byte:name_node.end_byte].decode()
-        symbol_text = content_bytes[symbol_node.start_byte:symbol_node.end_byte].decode()
+        symbol_name = content_bytes[name_node.start_byte:name_node.end_byte].decode(errors="replace")
+        symbol_text = content_bytes[symbol_node.start_byte:symbol_node.end_byte].decode(errors="replace")
         start_line = symbol_node.start_point[0] + 1
         end_line = symbol_node.end_point[0] + 1
 
@@ -120,10 +281,44 @@ def extract_symbols(filepath: str, original_filename: str | None = None) -> list
             "end_line": end_line,
             "filepath": str(path),
             "filename": filename,
+            "language": language,
+            "calls": set(),
+            "types": set(),
         })
+        spans.append((symbol_node.start_byte, symbol_node.end_byte, name_node.start_byte))
+
+    _attach_refs(spec, tree, content_bytes, symbols, spans)
+    for sym in symbols:
+        sym["calls"] = sorted(sym["calls"])
+        sym["types"] = sorted(sym["types"])
 
     return symbols
 
 
+def _attach_refs(spec, tree, content_bytes, symbols, spans) -> None:
+    """Record each call/type reference on its innermost enclosing symbol."""
+    if not symbols:
+        return
+    order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+    starts = [spans[i][0] for i in order]
+    kinds = {"call": "calls", "type": "types"}
+
+    for capture_name, nodes in QueryCursor(spec.refs_query).captures(tree.root_node).items():
+        key = kinds[capture_name]
+        for node in nodes:
+            # Walk back from the last symbol starting at or before the
+            # reference; the first one that still contains it is innermost
+            i = bisect.bisect_right(starts, node.start_byte) - 1
+            while i >= 0:
+                start, end, name_start = spans[order[i]]
+                if node.end_byte <= end:
+                    break
+                i -= 1
+            if i < 0 or node.start_byte == name_start:
+                continue
+            name = content_bytes[node.start_byte:node.end_byte].decode(errors="replace")
+            symbols[order[i]][key].add(name)
+
+
 # Keep old name for compatibility
 extract_functions = extract_symbols
@@ -0,0 +1,89 @@
+"""Reference index: which stored symbols call or use a given name.
+
+References are extracted at parse time and kept in a SQLite table next to
+the Chroma store, indexed by referenced name, so lookups never scan
+documents. Caller metadata is denormalized into each row.
+"""
+
+import sqlite3
+from contextlib import closing
+
+from dillm import db
+
+REFS_NAME = "refs.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    symbol_name TEXT NOT NULL,
+    symbol_type TEXT NOT NULL,
+    language TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    filepath TEXT NOT NULL,
+    start_line INTEGER,
+    end_line INTEGER,
+    project TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name, kind);
+"""
+
+COLUMNS = (
+    "symbol_name", "symbol_type", "language", "filename", "filepath",
+    "start_line", "end_line", "project", "version",
+)
+
+
+def connect() -> sqlite3.Connection:
+    db.STORE_PATH.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db.STORE_PATH / REFS_NAME)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def add(symbols: list[dict]) -> None:
+    """Record references for ingested symbols.
+
+    Each dict holds the symbol's stored metadata plus "id", "calls" and
+    "types".
+    """
+    rows = []
+    for sym in symbols:
+        meta = tuple(sym.get(col, "") for col in COLUMNS)
+        for kind, key in (("call", "calls"), ("type", "types")):
+            for name in sym[key]:
+                rows.append((name, kind, sym["id"], *meta))
+    if not rows:
+        return
+    placeholders = ", ".join("?" * (3 + len(COLUMNS)))
+    with closing(connect()) as conn, conn:
+        conn.executemany(
+            f"INSERT INTO refs (name, kind, doc_id, {', '.join(COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+
+
+def find(
+    name: str,
+    kind: str | None = None,
+    project: str | None = None,
+    version: str | None = None,
+) -> list[dict]:
+    """Symbols referencing name, optionally only by kind ("call" or "type")."""
+    sql = f"SELECT DISTINCT doc_id, kind, {', '.join(COLUMNS)} FROM refs WHERE name = ?"
+    params = [name]
+    for column, value in (("kind", kind), ("project", project), ("version", version)):
+        if value is not None:
+            sql += f" AND {column} = ?"
+            params.append(value)
+    sql += " ORDER BY filename, start_line"
+
+    with closing(connect()) as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [
+        {"id": row[0], "kind": row[1], **dict(zip(COLUMNS, row[2:]))}
+        for row in rows
+    ]
@@ -1,10 +1,16 @@
+import logging
+import os
+import signal
+import socket
 import tempfile
 import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Literal
 
+import uvicorn
 from fastapi import FastAPI, Request, UploadFile, File, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 
 import dillm
@@ -13,38 +19,163 @@ from dillm import db
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+logger = logging.getLogger(__name__)
+
+# Set in each serving process once the model is warmed and the symbol
+# index built
+ready = threading.Event()
+
+
+def load_model() -> None:
+    db.get_model()
+    db.warmup()
+
+
+def preload() -> None:
+    # Chroma's client does not survive fork, so the store is only opened
+    # here, in the process that serves requests
+    load_model()
+    db.get_symbol_index()
+    ready.set()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    def load_model():
-        db.get_model()
-
-    thread = threading.Thread(target=load_model, daemon=True)
-    thread.start()
+    if not ready.is_set():
+        thread = threading.Thread(target=preload, daemon=True)
+        thread.start()
     yield
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+def run(host: str, port: int, workers: int = 1) -> None:
+    """Serve the app, forking workers after the model is loaded.
+
+    Workers are forked from a parent that already holds the model, so its
+    weights are shared copy-on-write instead of loaded once per worker. The
+    store is opened in each worker after the fork, never in the parent. CUDA
+    cannot be used across fork, so on GPU the workers are spawned by uvicorn
+    instead and each loads its own copy.
+    """
+    if workers <= 1:
+        uvicorn.run(app, host=host, port=port)
+        return
+
+    # Probe for a GPU through NVML so the parent never initializes the CUDA
+    # driver, which forked children could not use
+    os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+    if db.get_device().type != "cpu":
+        logger.warning("CUDA does not survive fork; spawning workers that each load the model")
+        uvicorn.run("dillm.server:app", host=host, port=port, workers=workers)
+        return
+
+    load_model()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(sock, workers)
+            os._exit(0)
+        children.append(pid)
+
+    def shutdown(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    for pid in children:
+        os.waitpid(pid, 0)
+    sock.close()
+
+
+def _run_worker(sock: socket.socket, workers: int) -> None:
+    # Split cores between workers so intra-op threads don't oversubscribe
+    torch = db._get_torch()
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    config = uvicorn.Config(app, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/api/ready")
+async def readiness():
+    """Report ready once the model is warmed and the symbol index built."""
+    if not ready.is_set():
+        return JSONResponse({"ready": False}, status_code=503)
+    return {"ready": True}
+
+
 @app.get("/api/search/symbol", response_class=HTMLResponse)
 async def search_symbol(
     request: Request,
     q: str = "",
     project: str | None = None,
     version: str | None = None,
+    mode: Literal["exact", "prefix", "fuzzy"] = "exact",
+    limit: int = 20,
+):
+    """Look up a symbol by exact name, prefix, or fuzzy match within project/version."""
+    if not q.strip():
+        return templates.TemplateResponse(
+            "results.html", {"request": request, "results": [], "query": q}
+        )
+    results = dillm.find_symbol(
+        q, project=project, version=version, mode=mode, limit=limit
+    )
+    return templates.TemplateResponse(
+        "results.html", {"request": request, "results": results, "query": q}
+    )
+
+
+@app.get("/api/search/refs", response_class=HTMLResponse)
+async def search_refs(
+    request: Request,
+    q: str = "",
+    project: str | None = None,
+    version: str | None = None,
+    kind: Literal["call", "type"] | None = None,
+):
+    """Symbols that call or use q as a type, from the reference index."""
+    if not q.strip():
+        return templates.TemplateResponse(
+            "results.html", {"request": request, "results": [], "query": q}
+        )
+    results = dillm.find_refs(q, project=project, version=version, kind=kind)
+    return templates.TemplateResponse(
+        "results.html", {"request": request, "results": results, "query": q}
+    )
+
+
+@app.get("/api/search/callers", response_class=HTMLResponse)
+async def search_callers(
+    request: Request,
+    q: str = "",
+    project: str | None = None,
+    version: str | None = None,
 ):
-    """Look up a symbol by exact name within project/version."""
+    """Symbols that call q, from the reference index."""
     if not q.strip():
         return templates.TemplateResponse(
             "results.html", {"request": request, "results": [], "query": q}
         )
-    results = dillm.find_symbol(q, project=project, version=version)
+    results = dillm.find_callers(q, project=project, version=version)
     return templates.TemplateResponse(
         "results.html", {"request": request, "results": results, "query": q}
     )
@@ -0,0 +1,225 @@
+"""In-memory symbol-name index for prefix and fuzzy lookups.
+
+Names are kept in a sorted array for prefix scans and in a trigram index
+for fuzzy matching, so typeahead never goes through a Chroma metadata scan.
+"""
+
+import bisect
+from collections import defaultdict
+from collections.abc import Iterable
+
+import numpy as np
+
+
+# Fuzzy lookup budgets: posting entries merged per query, and candidates
+# scored against their own gram ids
+MAX_SCANNED = 8192
+MAX_CANDIDATES = 512
+
+
+def trigrams(name: str) -> set[str]:
+    if len(name) < 3:
+        return {name}
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def _grow(array: np.ndarray, length: int, extra: int = 1) -> np.ndarray:
+    """Return array with room for extra more items past length."""
+    if length + extra <= len(array):
+        return array
+    grown = np.empty(max(8, 2 * len(array), length + extra), dtype=array.dtype)
+    grown[:length] = array[:length]
+    return grown
+
+
+def _contains(posting: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Boolean mask of values present in a sorted, non-empty posting list."""
+    pos = np.searchsorted(posting, values)
+    pos[pos == len(posting)] = 0
+    return posting[pos] == values
+
+
+class SymbolIndex:
+    def __init__(self, entries: Iterable[dict] = ()):
+        self._entries: list[dict] = []
+        self._sorted: list[tuple[str, int]] = []
+        self._gram_ids: dict[str, int] = {}
+        # Numpy buffers carry spare capacity so add() appends in place; only
+        # the first _lengths[gram] posting items and the first
+        # _offsets[len(_entries)] _entry_grams items are valid.
+        #   _postings[gram]: sorted ids of entries containing gram
+        #   _entry_grams[_offsets[i]:_offsets[i + 1]]: gram ids of entry i
+        self._postings: dict[str, np.ndarray] = {}
+        self._lengths: dict[str, int] = {}
+
+        postings = defaultdict(list)
+        entry_grams = []
+        offsets = [0]
+        for entry in entries:
+            idx = len(self._entries)
+            key = entry["symbol_name"].lower()
+            self._entries.append(entry)
+            self._sorted.append((key, idx))
+            for gram in trigrams(key):
+                postings[gram].append(idx)
+                entry_grams.append(self._gram_id(gram))
+            offsets.append(len(entry_grams))
+        self._sorted.sort()
+        self._entry_grams = np.asarray(entry_grams, dtype=np.int32)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        for gram, posting in postings.items():
+            self._postings[gram] = np.asarray(posting, dtype=np.int64)
+            self._lengths[gram] = len(posting)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _gram_id(self, gram: str) -> int:
+        gram_id = self._gram_ids.get(gram)
+        if gram_id is None:
+            gram_id = self._gram_ids[gram] = len(self._gram_ids)
+        return gram_id
+
+    def _posting(self, gram: str) -> np.ndarray:
+        array = self._postings.get(gram)
+        if array is None:
+            return np.empty(0, dtype=np.int64)
+        return array[:self._lengths[gram]]
+
+    def add(self, entry: dict) -> None:
+        idx = len(self._entries)
+        key = entry["symbol_name"].lower()
+        grams = trigrams(key)
+
+        end = self._offsets[idx]
+        self._entry_grams = _grow(self._entry_grams, end, len(grams))
+        self._entry_grams[end:end + len(grams)] = [self._gram_id(g) for g in grams]
+        self._offsets = _grow(self._offsets, idx + 1)
+        self._offsets[idx + 1] = end + len(grams)
+
+        for gram in grams:
+            length = self._lengths.get(gram, 0)
+            array = self._postings.get(gram, np.empty(0, dtype=np.int64))
+            array = self._postings[gram] = _grow(array, length)
+            array[length] = idx
+            self._lengths[gram] = length + 1
+
+        self._entries.append(entry)
+        bisect.insort(self._sorted, (key, idx))
+
+    def _matches(self, entry: dict, project: str | None, version: str | None) -> bool:
+        if project is not None and entry["project"] != project:
+            return False
+        if version is not None and entry["version"] != version:
+            return False
+        return True
+
+    def prefix(
+        self,
+        query: str,
+        limit: int = 20,
+        project: str | None = None,
+        version: str | None = None,
+    ) -> list[dict]:
+        """Names starting with query (case-insensitive), in sorted order."""
+        query = query.lower()
+        out = []
+        i = bisect.bisect_left(self._sorted, (query, -1))
+        while i < len(self._sorted) and len(out) < limit:
+            key, idx = self._sorted[i]
+            if not key.startswith(query):
+                break
+            entry = self._entries[idx]
+            if self._matches(entry, project, version):
+                out.append(entry)
+            i += 1
+        return out
+
+    def _candidates(self, postings: list[np.ndarray], required: int) -> np.ndarray:
+        """Entry ids worth scoring, at most MAX_CANDIDATES of them.
+
+        Postings are in ascending length, and the rarest are merged while
+        they fit MAX_SCANNED. A match shares at least `required` grams, so
+        it already shares `required` minus the number of unmerged lists;
+        that pigeonhole filter is exact. Past it, the names sharing the
+        most rare grams are kept. When even the rarest list is over budget
+        it is narrowed by intersecting with the next rarest lists instead.
+        """
+        used = 0
+        total = 0
+        for posting in postings:
+            if total + len(posting) > MAX_SCANNED:
+                break
+            used += 1
+            total += len(posting)
+        if total:
+            candidates, shared = np.unique(
+                np.concatenate(postings[:used]), return_counts=True
+            )
+            keep = shared + (len(postings) - used) >= required
+            candidates = candidates[keep]
+            if len(candidates) > MAX_CANDIDATES:
+                top = np.argpartition(-shared[keep], MAX_CANDIDATES)
+                candidates = candidates[top[:MAX_CANDIDATES]]
+            return candidates
+
+        # Lists of grams absent from the index are empty; skip them
+        nonempty = [posting for posting in postings if len(posting)]
+        if not nonempty:
+            return np.empty(0, dtype=np.int64)
+        candidates = nonempty[0]
+        for posting in nonempty[1:]:
+            if len(candidates) <= MAX_CANDIDATES:
+                break
+            narrowed = candidates[_contains(posting, candidates)]
+            if not len(narrowed):
+                break
+            candidates = narrowed
+        return candidates[:MAX_CANDIDATES]
+
+    def fuzzy(
+        self,
+        query: str,
+        limit: int = 20,
+        project: str | None = None,
+        version: str | None = None,
+    ) -> list[dict]:
+        """Names ranked by trigram (Jaccard) similarity to query.
+
+        Matches share at least half of the query's trigrams. Candidates come
+        from the rarest posting lists and are scored against their own gram
+        ids, so no step scales with the index size or with how common the
+        query's grams are.
+        """
+        grams = trigrams(query.lower())
+        required = (len(grams) + 1) // 2
+        postings = sorted((self._posting(g) for g in grams), key=len)
+        candidates = self._candidates(postings, required)
+        if not len(candidates):
+            return []
+
+        in_query = np.zeros(len(self._gram_ids), dtype=np.uint8)
+        in_query[[self._gram_ids[g] for g in grams if g in self._gram_ids]] = 1
+        starts = self._offsets[candidates]
+        sizes = self._offsets[candidates + 1] - starts
+        # Flat positions of every candidate's gram ids, grouped by candidate
+        bounds = np.cumsum(sizes)
+        positions = np.arange(bounds[-1]) + np.repeat(starts - (bounds - sizes), sizes)
+        hits = in_query[self._entry_grams[positions]]
+        shared = np.add.reduceat(hits, bounds - sizes, dtype=np.int64)
+
+        keep = shared >= required
+        candidates = candidates[keep]
+        shared = shared[keep]
+        scores = shared / (len(grams) + sizes[keep] - shared)
+        order = np.argsort(-scores, kind="stable")
+
+        out = []
+        for i in order:
+            entry = self._entries[candidates[i]]
+            if not self._matches(entry, project, version):
+                continue
+            out.append({**entry, "similarity": float(scores[i])})
+            if len(out) == limit:
+                break
+        return out
@@ -0,0 +1,132 @@
+"""Measure HNSW recall and latency against exact search over stored vectors.
+
+Stored symbol embeddings are sampled as queries. For each candidate setting
+an in-memory collection is built from the store's vectors, and its top-k is
+compared against brute-force cosine top-k.
+"""
+
+import itertools
+import random
+import time
+import uuid
+
+import numpy as np
+
+from dillm import db
+
+
+def load_embeddings() -> tuple[list[str], np.ndarray]:
+    collection = db.get_collection()
+    results = collection.get(include=["embeddings"])
+    return results["ids"], np.asarray(results["embeddings"], dtype=np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force cosine top-k; returns row indices into vectors."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normed = vectors / np.maximum(norms, 1e-12)
+    q_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = (queries / np.maximum(q_norms, 1e-12)) @ normed.T
+    top = np.argpartition(-scores, min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(-scores, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def projection_recall(
+    full: np.ndarray,
+    reduced: np.ndarray,
+    sample: int = 100,
+    k: int = 10,
+    seed: int = 0,
+) -> float:
+    """Recall@k of exact search over reduced vectors versus full vectors."""
+    k = min(k, len(full))
+    picks = random.Random(seed).sample(range(len(full)), min(sample, len(full)))
+    want = exact_top_k(full, full[picks], k)
+    got = exact_top_k(reduced, reduced[picks], k)
+    hits = sum(len(set(w) & set(g)) for w, g in zip(want, got))
+    return hits / (k * len(picks))
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def run(
+    m_values: list[int],
+    construction_efs: list[int],
+    search_efs: list[int],
+    sample: int = 100,
+    k: int = 10,
+    seed: int = 0,
+) -> list[dict]:
+    """Evaluate every combination of the given HNSW settings.
+
+    Returns one row per candidate with recall@k and p50/p99 query latency
+    in milliseconds.
+    """
+    import chromadb
+
+    ids, vectors = load_embeddings()
+    if not ids:
+        return []
+
+    k = min(k, len(ids))
+    picks = random.Random(seed).sample(range(len(ids)), min(sample, len(ids)))
+    queries = vectors[picks]
+    exact = exact_top_k(vectors, queries, k)
+    expected = [{ids[j] for j in row} for row in exact]
+
+    client = chromadb.EphemeralClient()
+    batch = client.get_max_batch_size()
+    base = db.load_config()["hnsw"]
+    rows = []
+
+    # ef_search is read when the index is loaded, so each combination gets
+    # its own collection rather than modifying one in place.
+    candidates = itertools.product(m_values, construction_efs, search_efs)
+    for m, construction_ef, search_ef in candidates:
+        hnsw = {
+            **base,
+            "M": m,
+            "construction_ef": construction_ef,
+            "search_ef": search_ef,
+        }
+        name = f"tune-{uuid.uuid4().hex[:12]}"
+        collection = client.create_collection(
+            name=name, metadata=db.hnsw_metadata(hnsw)
+        )
+        start = time.perf_counter()
+        for i in range(0, len(ids), batch):
+            collection.add(
+                ids=ids[i:i + batch], embeddings=vectors[i:i + batch]
+            )
+        build_s = time.perf_counter() - start
+
+        # Warm up so the first timed query doesn't pay index load cost
+        collection.query(query_embeddings=queries[:1], n_results=k, include=[])
+
+        latencies = []
+        hits = 0
+        for query, want in zip(queries, expected):
+            start = time.perf_counter()
+            result = collection.query(
+                query_embeddings=[query], n_results=k, include=[]
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(want.intersection(result["ids"][0]))
+
+        rows.append(
+            {
+                "M": m,
+                "construction_ef": construction_ef,
+                "search_ef": search_ef,
+                "recall": hits / (k * len(expected)),
+                "p50_ms": _percentile(latencies, 50),
+                "p99_ms": _percentile(latencies, 99),
+                "build_s": build_s,
+            }
+        )
+        client.delete_collection(name)
+
+    return rows